@@ -1,11 +1,19 @@
 import logging
 log = logging.getLogger(__name__)
 
+import heapq
+
 from pyramid.settings import aslist
 
-from zope.interface import implementer
+from zope.interface import (
+    alsoProvides,
+    implementer,
+    )
 
-from .interfaces import IPlugSession
+from .interfaces import (
+    IPlugSession,
+    IPlugSessionBulk,
+    )
 
 @implementer(IPlugSession)
 class _ChainSessionPlug(object):
@@ -34,6 +42,37 @@ class _ChainSessionPlug(object):
         for plug in self.plugs:
             plug.clear(session, request)
 
+    # IPlugSessionBulk, only provided when every plug in the chain does
+    def keys(self):
+        # Every plug returns its keys in order, so merging them and dropping
+        # adjacent duplicates keeps the result in order without building
+        # another set of all the ids.
+        last = None
+        for session_id in heapq.merge(*[plug.keys() for plug in self.plugs]):
+            if session_id != last:
+                yield session_id
+            last = session_id
+
+    def load_many(self, session_ids):
+        session_ids = list(session_ids)
+        remaining = set(session_ids)
+
+        for plug in self.plugs:
+            if not remaining:
+                break
+
+            wanted = [sid for sid in session_ids if sid in remaining]
+            for entry in plug.load_many(wanted):
+                if entry[2]:
+                    remaining.discard(entry[0])
+                    yield entry
+
+    def dump_many(self, entries):
+        entries = list(entries)
+
+        for plug in self.plugs:
+            plug.dump_many(entries)
+
 
 required_settings = [
         'pluggable_session.chain.plugs',
@@ -51,8 +90,12 @@ def ChainSessionPlug(config):
         plug = config.maybe_dotted(plug)
         dotted_plugs.append(plug(config))
 
+    chain = _ChainSessionPlug(dotted_plugs)
+
+    if all(IPlugSessionBulk.providedBy(plug) for plug in dotted_plugs):
+        alsoProvides(chain, IPlugSessionBulk)
 
-    return _ChainSessionPlug(dotted_plugs)
+    return chain
 
 def includeme(config):
     config.registry.registerUtility(ChainSessionPlug(config), IPlugSession)
@@ -7,9 +7,25 @@ import tempfile
 
 from zope.interface import implementer
 
-from .interfaces import IPlugSession
+from pyramid.compat import bytes_
 
-@implementer(IPlugSession)
+from .interfaces import (
+    IPlugSession,
+    IPlugSessionBulk,
+    )
+
+def _write_session(path, session_id, sess_data):
+    fpath = os.path.join(path, session_id)
+
+    (fileno, fpath_temp) = tempfile.mkstemp(suffix=session_id, dir=path)
+
+    with os.fdopen(fileno, 'wb') as f:
+        f.write(sess_data)
+
+    os.rename(fpath_temp, fpath)
+    return fpath
+
+@implementer(IPlugSession, IPlugSessionBulk)
 class _FileSessionPlug(object):
     """ File based session
 
@@ -20,6 +36,9 @@ class _FileSessionPlug(object):
     that one process is writing while another is reading the same file.
     """
 
+    def __init__(self, path):
+        self.path = path
+
     def loads(self, session, request):
         path = request.registry.settings['pluggable_session.file.path']
         fpath = os.path.join(path, session._session_id)
@@ -35,15 +54,9 @@ class _FileSessionPlug(object):
 
     def dumps(self, session, request, sess_data):
         path = request.registry.settings['pluggable_session.file.path']
-        fpath = os.path.join(path, session._session_id)
-
-        (fileno, fpath_temp) = tempfile.mkstemp(suffix=session._session_id, dir=path)
 
         try:
-            with os.fdopen(fileno, 'wb') as f:
-                f.write(sess_data)
-
-            os.rename(fpath_temp, fpath)
+            _write_session(path, session._session_id, sess_data)
         except (IOError, Exception) as e:
             log.warning('Unable to write new session data to disk...')
             log.exception(e)
@@ -57,6 +70,32 @@ class _FileSessionPlug(object):
         except:
             pass
 
+    # IPlugSessionBulk
+    def keys(self):
+        # Skip any temporary files left behind by dumps()
+        return iter(sorted(
+            name for name in os.listdir(self.path)
+            if not name.startswith(tempfile.template)
+            ))
+
+    def load_many(self, session_ids):
+        for session_id in session_ids:
+            fpath = os.path.join(self.path, session_id)
+
+            try:
+                with open(fpath, 'rb') as f:
+                    written = os.fstat(f.fileno()).st_mtime
+                    sess_data = f.read()
+            except (IOError, OSError):
+                continue
+
+            yield (session_id, written, sess_data)
+
+    def dump_many(self, entries):
+        for (session_id, written, sess_data) in entries:
+            fpath = _write_session(self.path, session_id, bytes_(sess_data))
+            os.utime(fpath, (written, written))
+
 
 required_settings = [
         'pluggable_session.file.path',
@@ -74,7 +113,7 @@ def FileSessionPlug(config):
         raise RuntimeError('pluggable_session.file.path is not a path to a directory')
     config.registry.settings['pluggable_session.file.path'] = path
 
-    return _FileSessionPlug()
+    return _FileSessionPlug(path)
 
 def includeme(config):
     config.registry.registerUtility(FileSessionPlug(config), IPlugSession)
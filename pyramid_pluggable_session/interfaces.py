@@ -25,3 +25,35 @@ class IPlugSession(Interface):
         the data associated with the ``_session_id`` attribute of the
         ``session``.
         """
+
+class IPlugSessionBulk(Interface):
+    """ An optional extension to :class:`IPlugSession` for plugs that are able
+    to enumerate and bulk transfer the sessions they store. This is what
+    allows sessions to be migrated from one plug to another.
+
+    Entries are passed around as ``(session_id, written, session_data)``
+    tuples, where ``written`` is the time (as returned by ``time.time()``) the
+    session data was last stored, and ``session_data`` is the same opaque
+    object handed to :meth:`IPlugSession.dumps`.
+    """
+
+    def keys():
+        """ Return an iterator over the session ids stored by this plug, in
+        ascending order.
+
+        Plugs may have to load the full list of session ids to sort it, so
+        this is not guaranteed to use a bounded amount of memory. Loading and
+        storing the session data itself is done in batches.
+        """
+
+    def load_many(session_ids):
+        """ Given an iterable of ``session_ids`` return an iterator of entries
+        for those that are stored by this plug, session ids that are not
+        found are skipped.
+        """
+
+    def dump_many(entries):
+        """ Store all of the ``entries``, overwriting any previously stored
+        session data for the same session id. ``written`` should be retained
+        so that expiry keeps working for the stored sessions.
+        """
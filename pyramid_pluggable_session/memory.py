@@ -1,27 +1,390 @@
 import logging
 log = logging.getLogger(__name__)
 
-from zope.interface import implementer
+import atexit
+import mmap
+import os
+import os.path
+import struct
+import tempfile
+import threading
+import time
 
-from .interfaces import IPlugSession
+from zope.interface import (
+    alsoProvides,
+    implementer,
+    )
+
+from pyramid.compat import (
+    bytes_,
+    native_,
+    )
+
+from .interfaces import (
+    IPlugSession,
+    IPlugSessionBulk,
+    )
+
+class _Snapshot(object):
+    """ Read only view of a snapshot written by :func:`write_snapshot`
+
+    The snapshot file is memory mapped and its index is sorted by session id,
+    so a lookup is a binary search that only reads the handful of index
+    records it needs. Opening a snapshot costs next to nothing even when it
+    contains a large amount of sessions, and session data is only copied out
+    of the mapping when it is asked for.
+
+    The on disk format is a header, followed by the index, followed by the
+    session ids, followed by the session data::
+
+        header: magic (4s), version (B), count (I)
+        index:  count * (id offset (Q), id length (H), written (d),
+                offset (Q), length (I))
+        ids:    concatenated session ids, in the same order as the index
+        data:   concatenated session data
+    """
+
+    magic = b'PPSS'
+    version = 2
+
+    _header = struct.Struct('>4sBI')
+    _entry = struct.Struct('>QHdQI')
+
+    def __init__(self, fpath):
+        self._map = None
+        self._removed = set()
+
+        with open(fpath, 'rb') as f:
+            if os.fstat(f.fileno()).st_size < self._header.size:
+                raise ValueError('Snapshot is truncated')
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        (magic, version, self.count) = self._header.unpack_from(self._map, 0)
+
+        if magic != self.magic or version != self.version:
+            self.close()
+            raise ValueError('Not a session snapshot')
+
+        if len(self._map) < self._header.size + self.count * self._entry.size:
+            self.close()
+            raise ValueError('Snapshot index is truncated')
+
+    def _record(self, i):
+        pos = self._header.size + i * self._entry.size
+        (idoff, idlen, written, offset, length) = self._entry.unpack_from(self._map, pos)
+
+        size = len(self._map)
+        if idoff + idlen > size or offset + length > size:
+            raise ValueError('Snapshot index points past the end of the file')
+
+        return (self._map[idoff:idoff + idlen], written, offset, length)
+
+    def _find(self, session_id):
+        key = bytes_(session_id)
+        lo = 0
+        hi = self.count
+
+        while lo < hi:
+            mid = (lo + hi) // 2
+            record = self._record(mid)
+
+            if record[0] < key:
+                lo = mid + 1
+            elif record[0] > key:
+                hi = mid
+            else:
+                return record
+
+        return None
+
+    def _corrupt(self, e):
+        log.warning('Session snapshot is corrupt, starting cold...')
+        log.debug(e)
+        self.close()
+
+    def pop(self, session_id):
+        """ Remove ``session_id`` from the snapshot, returning a tuple of
+        ``(written, session_data)`` or None if it was not in the snapshot.
+        """
+        if self._map is None or session_id in self._removed:
+            return None
+
+        try:
+            record = self._find(session_id)
+        except (struct.error, ValueError) as e:
+            self._corrupt(e)
+            return None
+
+        if record is None:
+            return None
+
+        self._removed.add(session_id)
+
+        (_, written, offset, length) = record
+        return (written, native_(self._map[offset:offset + length]))
+
+    def discard(self, session_id):
+        """ Remove ``session_id`` from the snapshot without reading it
+        """
+        self._removed.add(session_id)
+
+    def _records(self):
+        if self._map is None:
+            return []
+
+        try:
+            return [self._record(i) for i in range(self.count)]
+        except (struct.error, ValueError) as e:
+            self._corrupt(e)
+            return []
+
+    def keys(self):
+        """ Return the session ids that have not yet been removed from the
+        snapshot.
+        """
+        session_ids = (native_(record[0]) for record in self._records())
+        return [sid for sid in session_ids if sid not in self._removed]
+
+    def items(self):
+        """ Yield ``(session_id, written, session_data)`` for every entry that
+        has not yet been removed from the snapshot.
+        """
+        records = self._records()
+
+        for (session_id, written, offset, length) in records:
+            session_id = native_(session_id)
+
+            if session_id not in self._removed:
+                yield (session_id, written, native_(self._map[offset:offset + length]))
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+        self._map = None
+
+def write_snapshot(fpath, entries):
+    """ Atomically write ``entries``, an iterable of ``(session_id, written,
+    session_data)`` tuples, to ``fpath`` in the format read by
+    :class:`_Snapshot`. Returns the amount of entries written.
+    """
+    entries = sorted(
+        (bytes_(session_id), written, bytes_(sess_data))
+        for (session_id, written, sess_data) in entries
+        )
+
+    idoff = _Snapshot._header.size + len(entries) * _Snapshot._entry.size
+    offset = idoff + sum(len(sid) for (sid, _, _) in entries)
+
+    path = os.path.dirname(fpath)
+    (fileno, fpath_temp) = tempfile.mkstemp(suffix='.snapshot', dir=path)
+
+    try:
+        with os.fdopen(fileno, 'wb') as f:
+            f.write(_Snapshot._header.pack(
+                _Snapshot.magic,
+                _Snapshot.version,
+                len(entries),
+                ))
+
+            for (sid, written, sess_data) in entries:
+                f.write(_Snapshot._entry.pack(
+                    idoff,
+                    len(sid),
+                    written,
+                    offset,
+                    len(sess_data),
+                    ))
+                idoff += len(sid)
+                offset += len(sess_data)
+
+            for (sid, _, _) in entries:
+                f.write(sid)
+
+            for (_, _, sess_data) in entries:
+                f.write(sess_data)
+
+        os.rename(fpath_temp, fpath)
+    except:
+        try:
+            os.unlink(fpath_temp)
+        except OSError:
+            pass
+        raise
+
+    return len(entries)
 
 def MemorySessionPlug(config):
+    """ Session plug storing sessions in the memory of the current process
+
+    Setting ``pluggable_session.memory.snapshot`` to a file path writes the
+    live sessions to that file at exit, and every
+    ``pluggable_session.memory.snapshot_interval`` seconds if set, so they can
+    be restored on the next start.
+
+    The snapshot path has to be unique to each process. When several worker
+    processes share a path, whichever writes last wins and the sessions held
+    by the others are lost. With a server that loads the application before
+    forking its workers the interval snapshots are written by the parent
+    process, which does not see any of the sessions in the workers.
+    """
     log.warning("This session plug is not recommended for production.")
+    settings = config.registry.settings
+
     storage = {}
+    written = {}
+    lock = threading.Lock()
+
+    timeout = int(settings.get('pluggable_session.timeout', 1200))
+    snapshot_path = settings.get('pluggable_session.memory.snapshot')
+    snapshot_interval = float(settings.get('pluggable_session.memory.snapshot_interval', 0))
+
+    snapshot = None
+    if snapshot_path:
+        snapshot_path = os.path.abspath(snapshot_path)
+
+        if not os.path.isdir(os.path.dirname(snapshot_path)):
+            raise RuntimeError('pluggable_session.memory.snapshot is not in an existing directory')
+
+        if os.path.exists(snapshot_path):
+            try:
+                snapshot = _Snapshot(snapshot_path)
+            except (IOError, OSError, ValueError) as e:
+                log.warning('Unable to load session snapshot, starting cold...')
+                log.debug(e)
+
+    def _expired(when, now):
+        return timeout and now - when > timeout
+
+    def _restore(session_id):
+        if snapshot is None:
+            return None
+
+        with lock:
+            entry = snapshot.pop(session_id)
+
+            if entry is None or _expired(entry[0], time.time()):
+                return None
+
+            storage.setdefault(session_id, entry[1])
+            written.setdefault(session_id, entry[0])
+            return storage[session_id]
+
+    def save_snapshot():
+        """ Write all live, unexpired, sessions to the snapshot file
+        """
+        now = time.time()
+
+        with lock:
+            entries = [
+                (session_id, written.get(session_id, now), sess_data)
+                for (session_id, sess_data) in list(storage.items())
+                ]
+
+            if snapshot is not None:
+                entries.extend(
+                    entry for entry in snapshot.items()
+                    if entry[0] not in storage
+                    )
+
+        # Writing happens without holding the lock so that requests restoring
+        # or clearing sessions don't have to wait on the disk, the temporary
+        # file and rename keep concurrent writers from clobbering each other.
+        entries = [entry for entry in entries if not _expired(entry[1], now)]
+        count = write_snapshot(snapshot_path, entries)
+
+        log.debug('Wrote %d sessions to %s', count, snapshot_path)
 
     @implementer(IPlugSession)
     class _MemorySessionPlug(object):
         def loads(self, session, request):
-            return storage.get(session._session_id, None)
+            sess_data = storage.get(session._session_id, None)
+
+            if sess_data is None:
+                sess_data = _restore(session._session_id)
+
+            return sess_data
 
         def dumps(self, session, request, sess_data):
             storage[session._session_id] = sess_data
+            written[session._session_id] = time.time()
 
         def clear(self, session, request):
-            if session._session_id in storage:
-                del storage[session._session_id]
+            # Hold the lock for all of it, otherwise a concurrent restore from
+            # the snapshot could put the session right back into storage.
+            with lock:
+                storage.pop(session._session_id, None)
+                written.pop(session._session_id, None)
+
+                if snapshot is not None:
+                    snapshot.discard(session._session_id)
+
+        # IPlugSessionBulk, only provided with a snapshot since the sessions
+        # would otherwise not outlive the process doing the transfer
+        def keys(self):
+            session_ids = set(storage.keys())
+
+            if snapshot is not None:
+                with lock:
+                    session_ids.update(snapshot.keys())
+
+            return iter(sorted(session_ids))
+
+        def load_many(self, session_ids):
+            for session_id in session_ids:
+                sess_data = storage.get(session_id, None)
+
+                if sess_data is None:
+                    sess_data = _restore(session_id)
+
+                if sess_data is not None:
+                    yield (session_id, written.get(session_id, time.time()), sess_data)
+
+        def dump_many(self, entries):
+            for (session_id, when, sess_data) in entries:
+                storage[session_id] = sess_data
+                written[session_id] = when
+
+    plug = _MemorySessionPlug()
+
+    if snapshot_path:
+        stopped = threading.Event()
+        plug.save_snapshot = save_snapshot
+        alsoProvides(plug, IPlugSessionBulk)
+
+        if snapshot_interval > 0:
+            plug._snapshot_thread = _start_snapshot_thread(
+                save_snapshot,
+                snapshot_interval,
+                stopped,
+                )
+
+        atexit.register(_stop_snapshots, save_snapshot, stopped)
+
+    return plug
+
+def _stop_snapshots(save_snapshot, stopped):
+    stopped.set()
+    _safe_snapshot(save_snapshot)
+
+def _safe_snapshot(save_snapshot):
+    try:
+        save_snapshot()
+    except (IOError, Exception) as e:
+        log.warning('Unable to write session snapshot to disk...')
+        log.exception(e)
+
+def _start_snapshot_thread(save_snapshot, interval, stopped):
+    def run():
+        while not stopped.is_set():
+            stopped.wait(interval)
+
+            if not stopped.is_set():
+                _safe_snapshot(save_snapshot)
 
-    return _MemorySessionPlug()
+    thread = threading.Thread(target=run, name='pluggable_session.memory.snapshot')
+    thread.daemon = True
+    thread.start()
+    return thread
 
 def includeme(config):
     config.registry.registerUtility(MemorySessionPlug(config), IPlugSession)
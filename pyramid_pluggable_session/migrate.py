@@ -0,0 +1,293 @@
+import optparse
+import os
+import os.path
+import sys
+import tempfile
+import textwrap
+import threading
+import time
+
+try:
+    import queue
+except ImportError: # pragma: no cover
+    import Queue as queue
+
+from pyramid.config import Configurator
+from pyramid.paster import get_appsettings
+
+from .interfaces import IPlugSessionBulk
+
+def main(argv=sys.argv, quiet=False):
+    command = MigrateCommand(argv, quiet)
+    return command.run()
+
+class MigrateCommand(object):
+    usage = '%prog [options] source_config_uri dest_config_uri'
+    description = """\
+    Copy all live sessions from the session plug configured in
+    source_config_uri to the session plug configured in dest_config_uri.
+
+    Both config uris point at an application section in an ini file, for
+    example "production.ini#old" and "production.ini#new", and each must set
+    "pluggable_session.plug". Both plugs need to provide IPlugSessionBulk.
+
+    Sessions that were last written more than the timeout ago are not copied.
+    When a checkpoint file is used an interrupted migration can be re-run and
+    will continue where it left off. The checkpoint file is removed once the
+    migration completes.
+    """
+
+    parser = optparse.OptionParser(
+        usage,
+        description=textwrap.dedent(description),
+        )
+    parser.add_option('-b', '--batch-size',
+                      dest='batch_size',
+                      type='int',
+                      default=100,
+                      help='Number of sessions to transfer at a time '
+                           '(default: 100)')
+    parser.add_option('-w', '--workers',
+                      dest='workers',
+                      type='int',
+                      default=4,
+                      help='Number of parallel workers (default: 4)')
+    parser.add_option('-t', '--timeout',
+                      dest='timeout',
+                      type='int',
+                      default=None,
+                      help='Skip sessions last written more than this many '
+                           'seconds ago, 0 copies everything (default: '
+                           'pluggable_session.timeout of the source)')
+    parser.add_option('-c', '--checkpoint',
+                      dest='checkpoint',
+                      default=None,
+                      help='File used to record progress, and to resume '
+                           'from if it exists')
+    parser.add_option('-i', '--interval',
+                      dest='interval',
+                      type='float',
+                      default=5.0,
+                      help='Seconds between progress reports (default: 5)')
+    parser.add_option('-q', '--quiet',
+                      dest='quiet',
+                      action='store_true',
+                      default=False,
+                      help='Do not report progress')
+
+    get_appsettings = staticmethod(get_appsettings) # testing
+
+    def __init__(self, argv, quiet=False):
+        self.options, self.args = self.parser.parse_args(argv[1:])
+        self.quiet = quiet or self.options.quiet
+
+        self.lock = threading.Lock()
+        self.stop = threading.Event()
+        self.errors = []
+
+        self.copied = 0
+        self.expired = 0
+        self.missing = 0
+
+        # Batches are completed out of order, the checkpoint only moves past a
+        # batch once every batch before it has been completed as well.
+        self.done = {}
+        self.next_batch = 0
+        self.mark = None
+
+    def out(self, msg): # pragma: no cover
+        if not self.quiet:
+            print(msg)
+
+    def err(self, msg): # pragma: no cover
+        sys.stderr.write(msg + '\n')
+
+    def get_plug(self, config_uri):
+        settings = self.get_appsettings(config_uri)
+
+        if 'pluggable_session.plug' not in settings:
+            raise RuntimeError('pluggable_session.plug needs to be set in ' + config_uri)
+
+        config = Configurator(settings=settings)
+        factory = config.maybe_dotted(settings['pluggable_session.plug'])
+        plug = factory(config)
+
+        if not IPlugSessionBulk.providedBy(plug):
+            raise RuntimeError(settings['pluggable_session.plug'] + ' does not support bulk transfers')
+
+        return (plug, settings)
+
+    def read_checkpoint(self):
+        fpath = self.options.checkpoint
+
+        if fpath is None or not os.path.exists(fpath):
+            return None
+
+        with open(fpath, 'r') as f:
+            return f.read().strip() or None
+
+    def write_checkpoint(self):
+        fpath = self.options.checkpoint
+
+        with self.lock:
+            mark = self.mark
+
+        if fpath is None or mark is None:
+            return
+
+        fpath = os.path.abspath(fpath)
+        (fileno, fpath_temp) = tempfile.mkstemp(dir=os.path.dirname(fpath))
+
+        with os.fdopen(fileno, 'w') as f:
+            f.write(mark + '\n')
+
+        os.rename(fpath_temp, fpath)
+
+    def remove_checkpoint(self):
+        fpath = self.options.checkpoint
+
+        if fpath is not None and os.path.exists(fpath):
+            os.unlink(fpath)
+
+    def batches(self, source, resume):
+        batch = []
+
+        for session_id in source.keys():
+            if resume is not None and session_id <= resume:
+                continue
+
+            batch.append(session_id)
+
+            if len(batch) >= self.options.batch_size:
+                yield batch
+                batch = []
+
+        if batch:
+            yield batch
+
+    def transfer(self, source, dest, timeout, work):
+        while True:
+            item = work.get()
+
+            if item is None:
+                return
+
+            (seq, batch) = item
+
+            if self.stop.is_set():
+                continue
+
+            try:
+                now = time.time()
+                live = []
+                expired = 0
+
+                for entry in source.load_many(batch):
+                    if timeout and now - entry[1] > timeout:
+                        expired += 1
+                    else:
+                        live.append(entry)
+
+                dest.dump_many(live)
+            except Exception as e:
+                with self.lock:
+                    self.errors.append(e)
+                self.stop.set()
+                continue
+
+            with self.lock:
+                self.copied += len(live)
+                self.expired += expired
+                self.missing += len(batch) - len(live) - expired
+
+                self.done[seq] = batch[-1]
+                while self.next_batch in self.done:
+                    self.mark = self.done.pop(self.next_batch)
+                    self.next_batch += 1
+
+    def report(self, started):
+        with self.lock:
+            copied, expired, missing = self.copied, self.expired, self.missing
+
+        elapsed = max(time.time() - started, 0.001)
+        self.out('%d copied, %d expired, %d missing, %.1f sessions/s' % (
+            copied, expired, missing,
+            (copied + expired + missing) / elapsed,
+            ))
+
+    def progress(self, started):
+        # Event.wait() only returns the flag from Python 2.7 on
+        while not self.stop.is_set():
+            self.stop.wait(self.options.interval)
+
+            if not self.stop.is_set():
+                self.report(started)
+                self.write_checkpoint()
+
+    def run(self):
+        if len(self.args) != 2:
+            self.err('You must provide a source and a destination config uri')
+            return 2
+
+        if self.options.batch_size < 1 or self.options.workers < 1:
+            self.err('The batch size and amount of workers must be at least 1')
+            return 2
+
+        (source_uri, dest_uri) = self.args
+
+        (source, settings) = self.get_plug(source_uri)
+        (dest, _) = self.get_plug(dest_uri)
+
+        timeout = self.options.timeout
+        if timeout is None:
+            timeout = int(settings.get('pluggable_session.timeout', 1200))
+
+        resume = self.read_checkpoint()
+        if resume is not None:
+            self.out('Resuming after session %s' % resume)
+
+        # A bounded queue keeps the amount of session ids in flight limited,
+        # no matter how many sessions the source holds.
+        work = queue.Queue(maxsize=self.options.workers * 2)
+        workers = []
+        for _ in range(self.options.workers):
+            worker = threading.Thread(
+                target=self.transfer,
+                args=(source, dest, timeout, work),
+                )
+            worker.daemon = True
+            worker.start()
+            workers.append(worker)
+
+        started = time.time()
+        reporter = threading.Thread(target=self.progress, args=(started,))
+        reporter.daemon = True
+        reporter.start()
+
+        try:
+            for seq, batch in enumerate(self.batches(source, resume)):
+                if self.stop.is_set():
+                    break
+                work.put((seq, batch))
+        finally:
+            for _ in workers:
+                work.put(None)
+
+            for worker in workers:
+                worker.join()
+
+            self.stop.set()
+            reporter.join()
+
+            self.write_checkpoint()
+            self.report(started)
+
+        if self.errors:
+            self.err('Migration failed: %s' % (self.errors[0],))
+            return 1
+
+        self.remove_checkpoint()
+        return 0
+
+if __name__ == '__main__': # pragma: no cover
+    sys.exit(main() or 0)
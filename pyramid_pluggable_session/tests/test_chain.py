@@ -0,0 +1,90 @@
+import unittest
+
+from pyramid import testing
+from zope.interface import implementer
+
+from pyramid_pluggable_session.interfaces import (
+    IPlugSession,
+    IPlugSessionBulk,
+    )
+
+@implementer(IPlugSession)
+class DummyPlug(object):
+    def __init__(self, config):
+        pass
+
+@implementer(IPlugSession, IPlugSessionBulk)
+class DummyBulkPlug(object):
+    def __init__(self, config):
+        pass
+
+class TestChainSessionPlug(unittest.TestCase):
+    def tearDown(self):
+        testing.tearDown()
+
+    def _makeOne(self, *plugs):
+        from pyramid_pluggable_session.chain import ChainSessionPlug
+        config = testing.setUp(settings={
+            'pluggable_session.chain.plugs': '\n'.join(plugs),
+            })
+        return ChainSessionPlug(config)
+
+    def test_missing_settings(self):
+        from pyramid_pluggable_session.chain import ChainSessionPlug
+        config = testing.setUp(settings={})
+        self.assertRaises(RuntimeError, ChainSessionPlug, config)
+
+    def test_provides_bulk_when_all_plugs_do(self):
+        chain = self._makeOne(
+            'pyramid_pluggable_session.tests.test_chain.DummyBulkPlug',
+            'pyramid_pluggable_session.tests.test_chain.DummyBulkPlug',
+            )
+        self.assertTrue(IPlugSessionBulk.providedBy(chain))
+
+    def test_no_bulk_when_a_plug_does_not(self):
+        chain = self._makeOne(
+            'pyramid_pluggable_session.tests.test_chain.DummyBulkPlug',
+            'pyramid_pluggable_session.tests.test_chain.DummyPlug',
+            )
+        self.assertTrue(IPlugSession.providedBy(chain))
+        self.assertFalse(IPlugSessionBulk.providedBy(chain))
+
+class TestChainSessionPlugBulk(unittest.TestCase):
+    def tearDown(self):
+        testing.tearDown()
+
+    def _makePlug(self):
+        from pyramid_pluggable_session.memory import MemorySessionPlug
+        config = testing.setUp(settings={})
+        return MemorySessionPlug(config)
+
+    def _makeOne(self, plugs):
+        from pyramid_pluggable_session.chain import _ChainSessionPlug
+        return _ChainSessionPlug(plugs)
+
+    def test_keys_merged_without_duplicates(self):
+        first = self._makePlug()
+        second = self._makePlug()
+        first.dump_many([('a', 1.0, 'a'), ('c', 1.0, 'c')])
+        second.dump_many([('b', 1.0, 'b'), ('c', 1.0, 'c'), ('d', 1.0, 'd')])
+        chain = self._makeOne([first, second])
+        self.assertEqual(list(chain.keys()), ['a', 'b', 'c', 'd'])
+
+    def test_load_many_prefers_first_plug(self):
+        first = self._makePlug()
+        second = self._makePlug()
+        first.dump_many([('a', 1.0, 'fast')])
+        second.dump_many([('a', 2.0, 'slow'), ('b', 2.0, 'slow')])
+        chain = self._makeOne([first, second])
+        self.assertEqual(
+            sorted(chain.load_many(['a', 'b', 'missing'])),
+            [('a', 1.0, 'fast'), ('b', 2.0, 'slow')],
+            )
+
+    def test_dump_many_writes_all_plugs(self):
+        first = self._makePlug()
+        second = self._makePlug()
+        chain = self._makeOne([first, second])
+        chain.dump_many(iter([('a', 1.0, 'first')]))
+        self.assertEqual(list(first.load_many(['a'])), [('a', 1.0, 'first')])
+        self.assertEqual(list(second.load_many(['a'])), [('a', 1.0, 'first')])
@@ -0,0 +1,39 @@
+import os
+import os.path
+import shutil
+import tempfile
+import unittest
+
+class TestFileSessionPlugBulk(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def _makeOne(self):
+        from pyramid_pluggable_session.file import _FileSessionPlug
+        return _FileSessionPlug(self.path)
+
+    def test_provides_interface(self):
+        from pyramid_pluggable_session.interfaces import IPlugSessionBulk
+        self.assertTrue(IPlugSessionBulk.providedBy(self._makeOne()))
+
+    def test_keys_sorted_without_temporary_files(self):
+        plug = self._makeOne()
+        plug.dump_many([('b', 10.0, b'second'), ('a', 10.0, b'first')])
+        open(os.path.join(self.path, 'tmpabcdefb'), 'wb').close()
+        self.assertEqual(list(plug.keys()), ['a', 'b'])
+
+    def test_dump_many_load_many(self):
+        plug = self._makeOne()
+        plug.dump_many([('a', 1000.0, b'first'), ('b', 2000.0, 'second')])
+        self.assertEqual(
+            list(plug.load_many(['a', 'missing', 'b'])),
+            [('a', 1000.0, b'first'), ('b', 2000.0, b'second')],
+            )
+
+    def test_dump_many_preserves_written(self):
+        plug = self._makeOne()
+        plug.dump_many([('a', 1000.0, b'first')])
+        self.assertEqual(os.stat(os.path.join(self.path, 'a')).st_mtime, 1000.0)
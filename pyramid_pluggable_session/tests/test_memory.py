@@ -0,0 +1,231 @@
+import os
+import os.path
+import shutil
+import tempfile
+import time
+import unittest
+
+from pyramid import testing
+
+class DummySession(object):
+    def __init__(self, session_id):
+        self._session_id = session_id
+
+class DummyAtexit(object):
+    def __init__(self):
+        self.registered = []
+
+    def register(self, func, *args):
+        self.registered.append((func, args))
+
+class TestMemorySessionPlug(unittest.TestCase):
+    def setUp(self):
+        from pyramid_pluggable_session import memory
+        self.path = tempfile.mkdtemp()
+        self.snapshot = os.path.join(self.path, 'sessions.snapshot')
+        self._atexit = memory.atexit
+        memory.atexit = DummyAtexit()
+
+    def tearDown(self):
+        from pyramid_pluggable_session import memory
+        memory.atexit = self._atexit
+        shutil.rmtree(self.path)
+        testing.tearDown()
+
+    def _makeOne(self, **kw):
+        from pyramid_pluggable_session.memory import MemorySessionPlug
+        settings = {
+            'pluggable_session.memory.snapshot': self.snapshot,
+            'pluggable_session.timeout': '1200',
+            }
+        settings.update(kw)
+        config = testing.setUp(settings=settings)
+        return MemorySessionPlug(config)
+
+    def _writeSnapshot(self, entries):
+        from pyramid_pluggable_session.memory import write_snapshot
+        return write_snapshot(self.snapshot, entries)
+
+    def test_no_snapshot(self):
+        plug = self._makeOne()
+        self.assertEqual(plug.loads(DummySession('a'), None), None)
+        self.assertFalse(os.path.exists(self.snapshot))
+
+    def test_round_trip(self):
+        plug = self._makeOne()
+        plug.dumps(DummySession('a'), None, 'first')
+        plug.dumps(DummySession('b'), None, 'caf\xe9 \xff')
+        plug.save_snapshot()
+
+        plug = self._makeOne()
+        self.assertEqual(plug.loads(DummySession('a'), None), 'first')
+        self.assertEqual(plug.loads(DummySession('b'), None), 'caf\xe9 \xff')
+        self.assertEqual(plug.loads(DummySession('c'), None), None)
+
+    def test_snapshot_keeps_unrestored_entries(self):
+        self._writeSnapshot([('a', time.time(), 'first')])
+        plug = self._makeOne()
+        plug.dumps(DummySession('b'), None, 'second')
+        plug.save_snapshot()
+
+        plug = self._makeOne()
+        self.assertEqual(plug.loads(DummySession('a'), None), 'first')
+        self.assertEqual(plug.loads(DummySession('b'), None), 'second')
+
+    def test_lookup_many_entries(self):
+        from pyramid_pluggable_session.memory import _Snapshot
+        now = time.time()
+        self._writeSnapshot(
+            ('%04d' % i, now, 'data%d' % i) for i in range(0, 1000, 2)
+            )
+        snapshot = _Snapshot(self.snapshot)
+        for i in range(1000):
+            entry = snapshot.pop('%04d' % i)
+            if i % 2:
+                self.assertEqual(entry, None)
+            else:
+                self.assertEqual(entry[1], 'data%d' % i)
+        self.assertEqual(snapshot.pop('0000'), None)
+        self.assertEqual(list(snapshot.items()), [])
+        snapshot.close()
+
+    def test_expired_entries_dropped(self):
+        now = time.time()
+        self._writeSnapshot([
+            ('old', now - 5000, 'stale'),
+            ('new', now, 'fresh'),
+            ])
+        plug = self._makeOne()
+        self.assertEqual(plug.loads(DummySession('old'), None), None)
+        self.assertEqual(plug.loads(DummySession('new'), None), 'fresh')
+
+    def test_expired_entries_not_saved(self):
+        now = time.time()
+        self._writeSnapshot([
+            ('old', now - 5000, 'stale'),
+            ('new', now, 'fresh'),
+            ])
+        self._makeOne().save_snapshot()
+
+        plug = self._makeOne(**{'pluggable_session.timeout': '0'})
+        self.assertEqual(plug.loads(DummySession('old'), None), None)
+        self.assertEqual(plug.loads(DummySession('new'), None), 'fresh')
+
+    def test_clear_removes_snapshot_entry(self):
+        self._writeSnapshot([('a', time.time(), 'first')])
+        plug = self._makeOne()
+        plug.clear(DummySession('a'), None)
+        self.assertEqual(plug.loads(DummySession('a'), None), None)
+
+        plug.save_snapshot()
+        plug = self._makeOne()
+        self.assertEqual(plug.loads(DummySession('a'), None), None)
+
+    def test_empty_file(self):
+        open(self.snapshot, 'wb').close()
+        plug = self._makeOne()
+        self.assertEqual(plug.loads(DummySession('a'), None), None)
+
+    def test_bad_magic(self):
+        with open(self.snapshot, 'wb') as f:
+            f.write(b'XXXX' + b'\x00' * 20)
+        plug = self._makeOne()
+        self.assertEqual(plug.loads(DummySession('a'), None), None)
+
+    def test_truncated_index(self):
+        from pyramid_pluggable_session.memory import _Snapshot
+        with open(self.snapshot, 'wb') as f:
+            f.write(_Snapshot._header.pack(_Snapshot.magic, _Snapshot.version, 5))
+        plug = self._makeOne()
+        self.assertEqual(plug.loads(DummySession('a'), None), None)
+        self.assertEqual(plug.loads(DummySession('a'), None), None)
+
+        plug.dumps(DummySession('b'), None, 'second')
+        plug.save_snapshot()
+        plug = self._makeOne()
+        self.assertEqual(plug.loads(DummySession('b'), None), 'second')
+
+    def test_truncated_data(self):
+        self._writeSnapshot([('a', time.time(), 'x' * 100)])
+        with open(self.snapshot, 'rb') as f:
+            data = f.read()
+        with open(self.snapshot, 'wb') as f:
+            f.write(data[:-10])
+        plug = self._makeOne()
+        self.assertEqual(plug.loads(DummySession('a'), None), None)
+
+    def test_registers_atexit(self):
+        from pyramid_pluggable_session import memory
+        self._makeOne()
+        self.assertEqual(len(memory.atexit.registered), 1)
+
+    def test_interval_snapshots(self):
+        from pyramid_pluggable_session import memory
+        plug = self._makeOne(**{
+            'pluggable_session.memory.snapshot_interval': '0.01',
+            })
+        plug.dumps(DummySession('a'), None, 'first')
+
+        for _ in range(200):
+            if os.path.exists(self.snapshot):
+                break
+            time.sleep(0.01)
+        self.assertTrue(os.path.exists(self.snapshot))
+
+        (func, args) = memory.atexit.registered[0]
+        func(*args)
+        plug._snapshot_thread.join(1)
+        self.assertFalse(plug._snapshot_thread.is_alive())
+
+        plug = self._makeOne()
+        self.assertEqual(plug.loads(DummySession('a'), None), 'first')
+
+    def test_snapshot_directory_missing(self):
+        self.snapshot = os.path.join(self.path, 'missing', 'sessions.snapshot')
+        self.assertRaises(RuntimeError, self._makeOne)
+
+class TestMemorySessionPlugBulk(unittest.TestCase):
+    def tearDown(self):
+        testing.tearDown()
+
+    def _makeOne(self):
+        from pyramid_pluggable_session.memory import MemorySessionPlug
+        config = testing.setUp(settings={})
+        return MemorySessionPlug(config)
+
+    def test_no_bulk_without_snapshot(self):
+        from pyramid_pluggable_session.interfaces import IPlugSessionBulk
+        self.assertFalse(IPlugSessionBulk.providedBy(self._makeOne()))
+
+    def test_dump_many_load_many(self):
+        plug = self._makeOne()
+        plug.dump_many([('b', 10.0, 'second'), ('a', 20.0, 'first')])
+        self.assertEqual(list(plug.keys()), ['a', 'b'])
+        self.assertEqual(
+            list(plug.load_many(['a', 'missing', 'b'])),
+            [('a', 20.0, 'first'), ('b', 10.0, 'second')],
+            )
+        self.assertEqual(plug.loads(DummySession('a'), None), 'first')
+
+    def test_keys_includes_snapshot(self):
+        from pyramid_pluggable_session import memory
+        path = tempfile.mkdtemp()
+        _atexit = memory.atexit
+        memory.atexit = DummyAtexit()
+        try:
+            snapshot = os.path.join(path, 'sessions.snapshot')
+            memory.write_snapshot(snapshot, [('b', time.time(), 'second')])
+            config = testing.setUp(settings={
+                'pluggable_session.memory.snapshot': snapshot,
+                })
+            plug = memory.MemorySessionPlug(config)
+            self.assertTrue(memory.IPlugSessionBulk.providedBy(plug))
+            plug.dump_many([('a', time.time(), 'first')])
+            self.assertEqual(list(plug.keys()), ['a', 'b'])
+            self.assertEqual(
+                [entry[2] for entry in plug.load_many(['a', 'b'])],
+                ['first', 'second'],
+                )
+        finally:
+            memory.atexit = _atexit
+            shutil.rmtree(path)
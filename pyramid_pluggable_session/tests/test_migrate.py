@@ -0,0 +1,155 @@
+import os
+import os.path
+import shutil
+import tempfile
+import time
+import unittest
+
+from pyramid import testing
+
+try:
+    import queue
+except ImportError: # pragma: no cover
+    import Queue as queue
+
+class FailingPlug(object):
+    """ Wraps a plug, failing dump_many() for any batch containing ``fail``
+    """
+    def __init__(self, plug, fail):
+        self.plug = plug
+        self.fail = fail
+
+    def __getattr__(self, name):
+        return getattr(self.plug, name)
+
+    def dump_many(self, entries):
+        entries = list(entries)
+        if self.fail in [entry[0] for entry in entries]:
+            raise IOError('Unable to write')
+        self.plug.dump_many(entries)
+
+class TestMigrateCommand(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.checkpoint = os.path.join(self.path, 'checkpoint')
+        self.source = self._makePlug()
+        self.dest = self._makePlug()
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+        testing.tearDown()
+
+    def _makePlug(self):
+        from pyramid_pluggable_session.memory import MemorySessionPlug
+        config = testing.setUp(settings={})
+        return MemorySessionPlug(config)
+
+    def _plugSettings(self, plug):
+        from zope.interface import alsoProvides
+        from pyramid_pluggable_session.interfaces import IPlugSessionBulk
+        alsoProvides(plug, IPlugSessionBulk)
+        return {
+            'pluggable_session.plug': lambda config: plug,
+            'pluggable_session.timeout': '1200',
+            }
+
+    def _makeOne(self, *args):
+        from pyramid_pluggable_session.migrate import MigrateCommand
+        settings = {
+            'source': self._plugSettings(self.source),
+            'dest': self._plugSettings(self.dest),
+            }
+        cmd = MigrateCommand(['migrate'] + list(args), quiet=True)
+        cmd.get_appsettings = lambda config_uri: dict(settings[config_uri])
+        self.messages = []
+        cmd.err = self.messages.append
+        return cmd
+
+    def _fill(self, count):
+        now = time.time()
+        session_ids = ['%02d' % i for i in range(count)]
+        self.source.dump_many([(sid, now, 'data' + sid) for sid in session_ids])
+        return session_ids
+
+    def test_missing_arguments(self):
+        self.assertEqual(self._makeOne('-q', 'source').run(), 2)
+        self.assertEqual(len(self.messages), 1)
+
+    def test_refuses_plug_without_bulk(self):
+        cmd = self._makeOne('source', 'dest')
+        cmd.get_appsettings = lambda config_uri: {
+            'pluggable_session.plug': 'pyramid_pluggable_session.tests.test_chain.DummyPlug',
+            }
+        self.assertRaises(RuntimeError, cmd.get_plug, 'source')
+
+    def test_refuses_memory_plug_without_snapshot(self):
+        cmd = self._makeOne('source', 'dest')
+        cmd.get_appsettings = lambda config_uri: {
+            'pluggable_session.plug': 'pyramid_pluggable_session.memory.MemorySessionPlug',
+            }
+        self.assertRaises(RuntimeError, cmd.get_plug, 'source')
+
+    def test_copies_sessions(self):
+        session_ids = self._fill(25)
+        cmd = self._makeOne('-b', '4', '-w', '3', 'source', 'dest')
+        self.assertEqual(cmd.run(), 0)
+        self.assertEqual(list(self.dest.keys()), session_ids)
+        self.assertEqual(cmd.copied, 25)
+
+    def test_skips_expired(self):
+        now = time.time()
+        self.source.dump_many([('a', now, 'live'), ('b', now - 5000, 'dead')])
+        cmd = self._makeOne('source', 'dest')
+        self.assertEqual(cmd.run(), 0)
+        self.assertEqual(list(self.dest.keys()), ['a'])
+        self.assertEqual(cmd.expired, 1)
+
+    def test_timeout_zero_copies_everything(self):
+        now = time.time()
+        self.source.dump_many([('a', now, 'live'), ('b', now - 5000, 'dead')])
+        self.assertEqual(self._makeOne('-t', '0', 'source', 'dest').run(), 0)
+        self.assertEqual(list(self.dest.keys()), ['a', 'b'])
+
+    def test_checkpoint_waits_for_earlier_batches(self):
+        cmd = self._makeOne('source', 'dest')
+        self._fill(4)
+
+        work = queue.Queue()
+        work.put((1, ['02', '03']))
+        work.put(None)
+        cmd.transfer(self.source, self.dest, 0, work)
+        self.assertEqual(cmd.mark, None)
+
+        work.put((0, ['00', '01']))
+        work.put(None)
+        cmd.transfer(self.source, self.dest, 0, work)
+        self.assertEqual(cmd.mark, '03')
+        self.assertEqual(cmd.done, {})
+
+    def test_stops_on_first_error(self):
+        session_ids = self._fill(10)
+        self.dest = FailingPlug(self.dest, '04')
+        cmd = self._makeOne('-b', '2', '-w', '1', '-c', self.checkpoint,
+                            'source', 'dest')
+        self.assertEqual(cmd.run(), 1)
+        self.assertEqual(len(cmd.errors), 1)
+        self.assertTrue(self.messages[0].startswith('Migration failed'))
+        self.assertEqual(list(self.dest.keys()), session_ids[:4])
+
+        with open(self.checkpoint) as f:
+            self.assertEqual(f.read().strip(), '03')
+
+    def test_resumes_from_checkpoint(self):
+        session_ids = self._fill(10)
+        with open(self.checkpoint, 'w') as f:
+            f.write('03\n')
+
+        cmd = self._makeOne('-b', '3', '-c', self.checkpoint, 'source', 'dest')
+        self.assertEqual(cmd.run(), 0)
+        self.assertEqual(list(self.dest.keys()), session_ids[4:])
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_progress_exits_when_stopped(self):
+        cmd = self._makeOne('-i', '0.01', 'source', 'dest')
+        cmd.stop.set()
+        cmd.progress(time.time())
@@ -87,6 +87,9 @@ setup(name='pyramid_pluggable_session',
           },
       tests_require = tests_require,
       test_suite="pyramid_pluggable_session.tests",
-      #entry_points =
+      entry_points = """\
+        [console_scripts]
+        pluggable_session_migrate = pyramid_pluggable_session.migrate:main
+      """,
       )
 